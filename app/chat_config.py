@@ -1,70 +1,142 @@
-from settings import MODEL
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from settings import (
+    MODEL,
+    KEEP_ALIVE,
+    MODEL_OPTIONS,
+    SUMMARY_MODEL,
+    ENABLE_SEMANTIC_CACHE,
+    EMBED_MODEL,
+    SEMANTIC_CACHE_THRESHOLD,
+)
 from datetime import datetime
+from semantic_cache import SemanticCache
 
 
-def chat_fn(client, message, history, document_store=None):
+# Static role/constraints block of the system prompt. It is sent as its own
+# system message ahead of everything volatile so it stays byte-identical
+# between turns and Ollama can reuse its cached prefill.
+_SYSTEM_PROMPT_PREFIX = """\
+**Role**: HR Document Analyst
+**Task**: Analyze resumes and office documents to extract key information
+**Constraints**:
+1. NEVER provide fabricated information
+2. Don't make up names or details. If there's no context, answer as is
+3. ALWAYS use the information provided in the documents to answer the user's questions
+4. If unsure, say "Information not found in document"
+5. Focus on factual extraction, not creative interpretation
+6. Format responses clearly with bullet points
+7. Flag inconsistencies between documents
+"""
+
+# Streamed chunks are coalesced and flushed to the UI at most every
+# YIELD_INTERVAL seconds, or sooner once YIELD_MIN_CHARS new characters arrive
+YIELD_INTERVAL = 0.03
+YIELD_MIN_CHARS = 64
+
+# Number of recent user/assistant turns sent verbatim; older turns are
+# replaced by a rolling summary generated in the background
+HISTORY_WINDOW_TURNS = 6
+SUMMARY_CACHE_SIZE = 64
+
+# After a failed summary request (e.g. SUMMARY_MODEL not pulled) no new one
+# is sent for this long; older turns are plainly truncated meanwhile
+SUMMARY_RETRY_SECONDS = 300
+
+_SUMMARY_INSTRUCTION = """\
+Summarize the conversation below between a user and an HR document analyst.
+If a summary so far is given, merge the new messages into it.
+Keep names, facts, figures and open questions. Be concise.
+"""
+
+# Module-level caches below are only touched from coroutines on Gradio's
+# event loop, so they need no locking.
+
+# Exact-match cache of completed replies, see _response_cache_key
+RESPONSE_CACHE_SIZE = 256
+
+_response_cache = OrderedDict()
+_semantic_cache = SemanticCache(RESPONSE_CACHE_SIZE, SEMANTIC_CACHE_THRESHOLD)
+
+_summary_cache = OrderedDict()
+_summary_pending = set()
+_summary_retry_at = 0.0  # time.monotonic() before which summaries are skipped
+_background_tasks = set()  # Strong references to in-flight background tasks
+
+
+async def chat_fn(client, message, history, document_store=None):
     """
     Chat function that sends messages to Ollama and streams responses.
     Parses thinking tokens from DeepSeek-R1 model and yields them separately.
     
     Args:
-        client: Ollama client instance
+        client: Async Ollama client instance
         message: Additional message to append (usually empty string)
-        history: List of message dicts with 'role' and 'content' keys
+        history: LLM-ready list of message dicts with 'role' and 'content' keys
         document_store: Dict of uploaded documents with content and metadata
     
     Yields:
         dict: Dictionary with 'thinking' and 'response' keys for streaming display
     """
+    # Get current date and time for context; the time is rounded to the hour
+    # so the volatile system message only changes once an hour
+    now = datetime.now()
+    current_date = now.strftime("%A, %B %d, %Y")
+    current_time = now.strftime("%H:00")
+    
+    # Serve repeated questions straight from the response cache, before any
+    # work (such as a history summary) is started for this turn
+    cache_key = _response_cache_key(current_date, history, message, document_store)
+    cached = _response_cache.get(cache_key)
+    if cached is not None:
+        _response_cache.move_to_end(cache_key)
+        yield _cached_reply(cached)
+        return
+    
+    # Fall back to near-duplicate questions asked in the same context; the
+    # embedding round trip is only paid when such a context is cached
+    semantic_key = question = query_embedding = None
+    if ENABLE_SEMANTIC_CACHE:
+        semantic_key, question = _semantic_question(
+            current_date, history, message, document_store
+        )
+        if question and _semantic_cache.has_context(semantic_key):
+            query_embedding = await _embed_question(client, question)
+            if query_embedding is not None:
+                cached = _semantic_cache.lookup(semantic_key, query_embedding)
+                if cached is not None:
+                    yield _cached_reply(cached)
+                    return
+    
     # Build messages array with system prompt
     messages = []
     
-    # Get current date and time for context
-    current_date = datetime.now().strftime("%A, %B %d, %Y")
-    current_time = datetime.now().strftime("%H:%M")
-    
     # Build document context if documents are available
     document_context = ""
     if document_store and len(document_store) > 0:
-        document_context = "\n\n**Available Documents:**\n"
+        parts = ["\n**Available Documents:**\n"]
         for doc_id, doc_data in document_store.items():
-            document_context += f"\n---\n**Document: {doc_data['filename']}**\n"
-            document_context += f"{doc_data['content'][:5000]}"  # Limit to first 5000 chars per doc
-            if len(doc_data['content']) > 5000:
-                document_context += "\n...(truncated)"
-            document_context += "\n---\n"
-    
-    system_prompt = f"""\
-        **Role**: HR Document Analyst
-        **Task**: Analyze resumes and office documents to extract key information
-        **Constraints**:
-        1. NEVER provide fabricated information
-        2. Don't make up names or details. If there's no context, answer as is
-        3. ALWAYS use the information provided in the documents to answer the user's questions
-        4. If unsure, say "Information not found in document"
-        5. Focus on factual extraction, not creative interpretation
-        6. Format responses clearly with bullet points
-        7. Flag inconsistencies between documents
-        
-        Current date: {current_date}
-        Current time: {current_time} (24-hour format)
-        {document_context}
-    """
+            parts.append(f"\n---\n**Document: {doc_data['filename']}**\n")
+            parts.append(doc_data['snippet'])  # Precomputed at upload time
+            if doc_data['truncated']:
+                parts.append("\n...(truncated)")
+            parts.append("\n---\n")
+        document_context = "".join(parts)
     
-    messages.append({"role": "system", "content": system_prompt})
+    system_context = "".join([
+        f"Current date: {current_date}\n",
+        f"Current time: {current_time} (24-hour format)\n",
+        document_context,
+    ])
     
-    # Add conversation history
-    # Filter out empty assistant messages and metadata
-    for msg in history:
-        role = msg.get("role")
-        content = msg.get("content")
-        
-        if role and content:
-            # Only add the actual content, not thinking metadata
-            if role == "assistant" and not msg.get("metadata", {}).get("title"):
-                messages.append({"role": role, "content": content})
-            elif role == "user":
-                messages.append({"role": role, "content": content})
+    # Stable prefix first, volatile date/time/document context second
+    messages.append({"role": "system", "content": _SYSTEM_PROMPT_PREFIX})
+    messages.append({"role": "system", "content": system_context})
+    
+    # Add conversation history (already filtered to LLM-ready role/content dicts)
+    messages.extend(_window_history(client, history))
     
     # Only add additional message if provided and not empty
     if message and message.strip():
@@ -72,12 +144,14 @@ def chat_fn(client, message, history, document_store=None):
     
     # Stream response from Ollama with thinking enabled
     try:
-        response = client.chat(
+        response = await client.chat(
             model=MODEL,
             messages=messages,
             stream=True,
+            keep_alive=KEEP_ALIVE,
             options={
-                "think": True  # Enable thinking mode for DeepSeek-R1
+                "think": True,  # Enable thinking mode for DeepSeek-R1
+                **MODEL_OPTIONS,
             }
         )
         
@@ -86,9 +160,13 @@ def chat_fn(client, message, history, document_store=None):
         thinking_complete = False
         prompt_eval_count = 0
         eval_count = 0
+        pending = False
+        last_yield_ts = time.monotonic()
+        last_yielded_len = 0
         
-        for chunk in response:
+        async for chunk in response:
             should_yield = False
+            force_yield = False
 
             if "prompt_eval_count" in chunk:
                 prompt_eval_count = chunk["prompt_eval_count"]
@@ -115,9 +193,21 @@ def chat_fn(client, message, history, document_store=None):
                     # If we're getting content, thinking is likely complete
                     if thinking_buffer and not thinking_complete:
                         thinking_complete = True
+                        force_yield = True
                         # print(f"[DEBUG] Thinking complete, total: {len(thinking_buffer)} chars")
 
-            if should_yield:
+            if not should_yield:
+                continue
+
+            # Batch chunks so the UI is not re-rendered for every token
+            pending = True
+            ts = time.monotonic()
+            buffered_len = len(thinking_buffer) + len(response_buffer)
+            if (
+                force_yield
+                or ts - last_yield_ts >= YIELD_INTERVAL
+                or buffered_len - last_yielded_len >= YIELD_MIN_CHARS
+            ):
                 yield {
                     'thinking': thinking_buffer,
                     'response': response_buffer,
@@ -125,6 +215,38 @@ def chat_fn(client, message, history, document_store=None):
                     'prompt_eval_count': prompt_eval_count,
                     'eval_count': eval_count,
                 }
+                pending = False
+                last_yield_ts = ts
+                last_yielded_len = buffered_len
+
+        # Flush whatever is left once the stream ends
+        if pending:
+            yield {
+                'thinking': thinking_buffer,
+                'response': response_buffer,
+                'thinking_complete': thinking_complete,
+                'prompt_eval_count': prompt_eval_count,
+                'eval_count': eval_count,
+            }
+
+        if response_buffer:
+            reply = {
+                'thinking': thinking_buffer,
+                'response': response_buffer,
+                'thinking_complete': True,
+                'prompt_eval_count': prompt_eval_count,
+                'eval_count': eval_count,
+            }
+            _response_cache[cache_key] = reply
+            while len(_response_cache) > RESPONSE_CACHE_SIZE:
+                _response_cache.popitem(last=False)
+            if query_embedding is not None:
+                _semantic_cache.add(semantic_key, query_embedding, reply)
+            elif question:
+                # Embed off the reply path; nothing was cached for this context
+                _start_background_task(
+                    _remember_reply(client, semantic_key, question, reply)
+                )
                 
     except Exception as e:
         error_message = f"Error communicating with Ollama: {str(e)}"
@@ -133,4 +255,220 @@ def chat_fn(client, message, history, document_store=None):
             'thinking': '',
             'response': error_message,
             'thinking_complete': True
-        }
\ No newline at end of file
+        }
+
+
+def _cached_reply(reply):
+    """
+    Copy a cached reply for replay on the current turn.
+    
+    Token counts are zeroed because no tokens were processed for this turn.
+    
+    Args:
+        reply: Cached reply dict
+    
+    Returns:
+        dict: Reply chunk to yield
+    """
+    return {**reply, 'prompt_eval_count': 0, 'eval_count': 0}
+
+
+def _response_cache_key(current_date, history, message, document_store):
+    """
+    Build the response cache key for a chat turn.
+    
+    The key covers everything that shapes the reply except the hour: the
+    static prompt, the date, the conversation so far and the set of document
+    IDs. Document IDs are content hashes, so removed or changed documents
+    can never produce a stale hit.
+    
+    Args:
+        current_date: Formatted date included in the system context
+        history: LLM-ready list of message dicts
+        message: Additional user message, if any
+        document_store: Dict of uploaded documents keyed by document ID
+    
+    Returns:
+        tuple: (conversation digest, frozenset of document IDs)
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (_SYSTEM_PROMPT_PREFIX, current_date, message or ""):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    for msg in history:
+        digest.update(f"{msg['role']}\0{msg['content']}\0".encode("utf-8"))
+    return digest.digest(), frozenset(document_store or ())
+
+
+def _semantic_question(current_date, history, message, document_store):
+    """
+    Find the latest user question and key it by the context it was asked in.
+    
+    The context is everything before the question, hashed the same way as
+    the exact-match cache key.
+    
+    Args:
+        current_date: Formatted date included in the system context
+        history: LLM-ready list of message dicts
+        message: Additional user message, if any
+        document_store: Dict of uploaded documents keyed by document ID
+    
+    Returns:
+        tuple: (context key, question), both None when there is no question
+    """
+    if message and message.strip():
+        question, prior = message, history
+    elif history and history[-1]["role"] == "user":
+        question, prior = history[-1]["content"], history[:-1]
+    else:
+        return None, None
+    
+    return _response_cache_key(current_date, prior, "", document_store), question
+
+
+async def _embed_question(client, question):
+    """
+    Embed a question for the semantic cache.
+    
+    Args:
+        client: Async Ollama client instance
+        question: Question text
+    
+    Returns:
+        Question embedding, or None if embedding fails
+    """
+    try:
+        return (await client.embed(model=EMBED_MODEL, input=question))["embeddings"][0]
+    except Exception as e:
+        print(f"Error embedding question for semantic cache: {e}")
+        return None
+
+
+async def _remember_reply(client, semantic_key, question, reply):
+    """
+    Embed a question after its reply completed and add it to the semantic cache.
+    
+    Args:
+        client: Async Ollama client instance
+        semantic_key: Context key the question was asked in
+        question: Question text
+        reply: Completed reply dict
+    """
+    embedding = await _embed_question(client, question)
+    if embedding is not None:
+        _semantic_cache.add(semantic_key, embedding, reply)
+
+
+def _start_background_task(coro):
+    """
+    Run a coroutine as a task on the running loop, keeping it referenced.
+    
+    Args:
+        coro: Coroutine to run
+    """
+    task = asyncio.get_running_loop().create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def _window_history(client, history):
+    """
+    Bound the history sent to the LLM to the most recent turns.
+    
+    Older messages are replaced by a rolling summary built one window at a
+    time: each summary covers the previous summary plus the next
+    HISTORY_WINDOW_TURNS turns, so the summarizer input stays bounded. The
+    newest available summary is always used; a summary for the next window
+    is generated in a background task when missing. While the summarizer is
+    backing off after a failure, turns not covered by a summary are dropped
+    so the history stays bounded. Must be called from the running event loop.
+    
+    Args:
+        client: Async Ollama client instance
+        history: LLM-ready list of message dicts
+    
+    Returns:
+        list: Messages to send, optionally led by a summary system message
+    """
+    window = 2 * HISTORY_WINDOW_TURNS
+    cut = (len(history) - window) // window * window
+    if cut <= 0:
+        return history
+    
+    # keys[i] identifies the prefix history[:(i + 1) * window]
+    digest = hashlib.blake2b(digest_size=16)
+    keys = []
+    for start in range(0, cut, window):
+        for msg in history[start:start + window]:
+            digest.update(f"{msg['role']}\0{msg['content']}\0".encode("utf-8"))
+        keys.append(digest.copy().digest())
+    
+    # Find the longest prefix that already has a summary
+    summarized, summary = 0, None
+    for i in range(len(keys) - 1, -1, -1):
+        summary = _summary_cache.get(keys[i])
+        if summary is not None:
+            _summary_cache.move_to_end(keys[i])
+            summarized = (i + 1) * window
+            break
+    
+    # Extend it by one window in the background, or truncate if the
+    # summarizer recently failed
+    start = summarized
+    if summarized < cut:
+        if time.monotonic() < _summary_retry_at:
+            start = cut
+        else:
+            next_key = keys[summarized // window]
+            if next_key not in _summary_pending:
+                _summary_pending.add(next_key)
+                _start_background_task(_summarize_history(
+                    client, next_key, summary, history[summarized:summarized + window]
+                ))
+    
+    if summary is None:
+        return history[start:]
+    
+    summary_message = {"role": "system", "content": f"Prior conversation summary: {summary}"}
+    return [summary_message] + history[start:]
+
+
+async def _summarize_history(client, key, previous_summary, new_messages):
+    """
+    Fold one window of turns into the rolling summary and cache the result.
+    
+    Args:
+        client: Async Ollama client instance
+        key: Cache key identifying the summarized prefix
+        previous_summary: Summary of the turns before new_messages, if any
+        new_messages: Message dicts of the window being summarized
+    """
+    global _summary_retry_at
+    transcript = "\n\n".join(f"{msg['role']}: {msg['content']}" for msg in new_messages)
+    if previous_summary:
+        transcript = f"Summary so far:\n{previous_summary}\n\nNew messages:\n{transcript}"
+    try:
+        response = await client.chat(
+            model=SUMMARY_MODEL,
+            messages=[
+                {"role": "system", "content": _SUMMARY_INSTRUCTION},
+                {"role": "user", "content": transcript},
+            ],
+            think=False,
+            keep_alive=KEEP_ALIVE,
+            options=MODEL_OPTIONS,
+        )
+        summary = response["message"]["content"].strip()
+    except Exception as e:
+        _summary_retry_at = time.monotonic() + SUMMARY_RETRY_SECONDS
+        print(
+            f"Error summarizing conversation history, retrying in "
+            f"{SUMMARY_RETRY_SECONDS}s: {e}"
+        )
+        summary = None
+    
+    _summary_pending.discard(key)
+    if summary:
+        _summary_cache[key] = summary
+        while len(_summary_cache) > SUMMARY_CACHE_SIZE:
+            _summary_cache.popitem(last=False)
@@ -13,7 +13,8 @@ from .chat_handlers import (
 from .document_handlers import (
     handle_file_upload,
     format_document_display,
-    clear_documents
+    clear_documents,
+    get_document_content
 )
 
 __all__ = [
@@ -23,4 +24,5 @@ __all__ = [
     'handle_file_upload',
     'format_document_display',
     'clear_documents',
+    'get_document_content',
 ]
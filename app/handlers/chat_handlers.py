@@ -9,19 +9,32 @@ This module contains all chat-related business logic including:
 
 import gradio as gr
 from gradio import ChatMessage
-from typing import List, Dict, Generator, Tuple
+from typing import List, Dict, AsyncGenerator, Optional, Tuple
 
 
-def add_message(history: list, message) -> Tuple[list, gr.MultimodalTextbox]:
+# Headers for the thinking panel, keyed by whether thinking is complete
+_THINKING_HEADERS = {
+    True: "**✓ Thinking**\n\n",
+    False: "**⏳ Thinking**\n\n",
+}
+
+
+def add_message(
+    history: list,
+    message,
+    llm_history: list,
+) -> Tuple[list, gr.MultimodalTextbox, list]:
     """
     Add user message to chat history.
     
     Args:
         history: Current chat history as list of ChatMessage objects
         message: User message (can be dict with 'text' key or string)
+        llm_history: LLM-ready message dicts, maintained alongside the chat history
         
     Returns:
-        Tuple of (updated history, cleared textbox with interactive=False)
+        Tuple of (updated history, cleared textbox with interactive=False,
+        updated llm_history)
     """
     if isinstance(message, dict):
         user_content = message.get("text", "")
@@ -35,15 +48,17 @@ def add_message(history: list, message) -> Tuple[list, gr.MultimodalTextbox]:
                 content=user_content
             )
         )
-    return history, gr.MultimodalTextbox(value=None, interactive=False)
+        llm_history.append({"role": "user", "content": user_content})
+    return history, gr.MultimodalTextbox(value=None, interactive=False), llm_history
 
 
-def bot_response(
+async def bot_response(
     history: list, 
+    llm_history: list,
     document_store: dict,
     ollama_client,
     chat_fn,
-) -> Generator[Tuple[list, list, dict], None, None]:
+) -> AsyncGenerator[Tuple[list, list, dict], None]:
     """
     Stream bot response with thinking steps displayed separately.
     
@@ -53,30 +68,30 @@ def bot_response(
     
     Args:
         history: Chat history as a list of ChatMessage objects
+        llm_history: LLM-ready message dicts; the final assistant reply is
+            appended once streaming finishes
         document_store: Dictionary containing document embeddings and metadata
-        ollama_client: Ollama client instance for LLM communication
-        chat_fn: Chat function that generates responses
+        ollama_client: Async Ollama client instance for LLM communication
+        chat_fn: Async generator function that streams responses
         
     Yields:
         Tuple of (updated_chat_history, thinking_messages_list)
     """
-    # Convert ChatMessage objects to dictionary format for LLM processing
-    history_for_llm = _extract_message_content(history)
-    
     # Initialize state tracking
-    response_generator = chat_fn(ollama_client, "", history_for_llm, document_store)
-    response_msg_added = False
+    response_generator = chat_fn(ollama_client, "", llm_history, document_store)
+    response = ""
+    response_message = None
     thinking_messages = []
     current_thinking_content = ""
     
     # Initialize token counts
     token_counts = {'prompt': 0, 'response': 0}
     
-    
-    
+    # Signature of the last emitted frame, used to skip no-op UI updates
+    last_sig = None
 
     # Process streaming chunks from LLM
-    for chunk in response_generator:
+    async for chunk in response_generator:
         thinking = chunk.get('thinking', '')
         response = chunk.get('response', '')
         thinking_complete = chunk.get('thinking_complete', False)
@@ -99,12 +114,21 @@ def bot_response(
             current_thinking_content = thinking
         
         # Add or update response message in chat history
-        history = _update_chat_response(history, response, response_msg_added)
-        if response and not response_msg_added:
-            response_msg_added = True
+        response_message = _update_chat_response(history, response, response_message)
+        
+        # Only re-render when visible content changed; token counts are shown
+        # after the response completes and the final yield below carries them
+        sig = (len(thinking), len(response), bool(thinking_complete))
+        if sig == last_sig:
+            continue
+        last_sig = sig
         
         yield history, thinking_messages, token_counts
     
+    # Keep the LLM-ready history in sync with the completed reply
+    if response:
+        llm_history.append({"role": "assistant", "content": response})
+    
     # Final yield with completion status
     if not thinking_messages:
         thinking_messages = _create_status_message("No thinking data available")
@@ -122,20 +146,7 @@ def show_history_size(history: list) -> str:
     Returns:
         Formatted string showing total character count
     """
-    total = 0
-    for message in history:
-        if isinstance(message, ChatMessage):
-            content = message.content
-        elif isinstance(message, dict):
-            content = message.get("content")
-        else:
-            continue
-
-        if isinstance(content, str):
-            total += len(content)
-        elif isinstance(content, dict) and "text" in content:
-            total += len(content["text"])
-
+    total = sum(_content_len(message) for message in history)
     return f"History size: {total}"
 
 
@@ -144,29 +155,28 @@ def show_history_size(history: list) -> str:
 # ============================================================================
 
 
-def _extract_message_content(history: list) -> list:
+def _content_len(message) -> int:
     """
-    Extract message content from ChatMessage objects for LLM processing.
-    
-    Converts Gradio ChatMessage objects to simple dictionaries that can
-    be passed to the LLM API.
+    Get the character count of a single chat message.
     
     Args:
-        history: List of ChatMessage objects or dictionaries
+        message: ChatMessage object or message dictionary
         
     Returns:
-        List of message dictionaries with 'role' and 'content' keys
+        Length of the message text, or 0 if it has no text content
     """
-    extracted = []
-    for msg in history:
-        if isinstance(msg, ChatMessage):
-            extracted.append({
-                "role": msg.role,
-                "content": msg.content
-            })
-        else:
-            extracted.append(msg)
-    return extracted
+    if isinstance(message, ChatMessage):
+        content = message.content
+    elif isinstance(message, dict):
+        content = message.get("content")
+    else:
+        return 0
+
+    if isinstance(content, str):
+        return len(content)
+    if isinstance(content, dict) and "text" in content:
+        return len(content["text"])
+    return 0
 
 
 def _update_thinking_messages(
@@ -198,11 +208,11 @@ def _update_thinking_messages(
             return _create_status_message("Waiting for response...")
         return thinking_messages
     
-    status_icon = "✓" if thinking_complete else "⏳"
-    formatted_content = f"**{status_icon} Thinking**\n\n{thinking}"
+    formatted_content = _THINKING_HEADERS[bool(thinking_complete)] + thinking
     
-    # Check if this is a new thinking step or an update to existing one
-    if thinking_messages and thinking.startswith(current_thinking_content):
+    # Thinking is accumulated append-only in chat_fn, so a buffer at least as
+    # long as the one already displayed is the same step still streaming
+    if thinking_messages and len(thinking) >= len(current_thinking_content):
         # Update the last message (streaming the same thinking step)
         thinking_messages[-1] = {
             "role": "assistant",
@@ -221,32 +231,34 @@ def _update_thinking_messages(
 def _update_chat_response(
     history: list,
     response: str,
-    response_msg_added: bool
-) -> list:
+    response_message: Optional[ChatMessage]
+) -> Optional[ChatMessage]:
     """
     Add or update the assistant's response in chat history.
     
+    The response message is created once and then updated in place as
+    further chunks stream in.
+    
     Args:
         history: Current chat history
         response: Response content from the LLM
-        response_msg_added: Whether a response message has already been added
+        response_message: Response message already in history, if any
         
     Returns:
-        Updated chat history
+        The response message in history, or None if nothing was added yet
     """
     if not response:
-        return history
-    
-    response_message = ChatMessage(role="assistant", content=response)
+        return response_message
     
-    if not response_msg_added:
+    if response_message is None:
         # Add new response message
+        response_message = ChatMessage(role="assistant", content=response)
         history.append(response_message)
     else:
         # Update existing response message
-        history[-1] = response_message
+        response_message.content = response
     
-    return history
+    return response_message
 
 
 def _create_status_message(status_text: str) -> list:
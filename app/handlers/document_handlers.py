@@ -7,67 +7,96 @@ This module handles:
 - Document display formatting
 """
 
+import atexit
+import hashlib
 import os
+import shutil
+import tempfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 
-def handle_file_upload(files, document_store: dict) -> Tuple[dict, list]:
+# Number of characters from each document that is sent to the LLM as context
+SNIPPET_CHARS = 5000
+
+# Upper bound on how much of an uploaded file is read into memory
+MAX_DOC_BYTES = 1_048_576
+
+# Block size used when streaming files for hashing
+READ_BLOCK_BYTES = 64 * 1024
+
+# Shared pool for reading uploaded files in parallel
+_read_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="doc-reader")
+
+# Full document text is kept compressed on disk rather than in session state
+CONTENT_COMPRESS_LEVEL = 3
+_content_dir = tempfile.mkdtemp(prefix="rag_docs_")
+atexit.register(shutil.rmtree, _content_dir, ignore_errors=True)
+
+
+def handle_file_upload(
+    files,
+    document_store: dict,
+    document_rows: list,
+) -> Tuple[dict, list, list]:
     """
     Handle file uploads and update document store.
     
     Processes uploaded files, extracts their content, and stores them
-    with metadata. Automatically skips duplicate files.
+    with metadata. Automatically skips duplicate files. Display rows for
+    new documents are appended to document_rows rather than rebuilding
+    the whole table.
     
     Args:
         files: List of file paths from Gradio file upload
         document_store: Dictionary storing document data
+        document_rows: Display rows kept in sync with document_store
         
     Returns:
-        Tuple of (updated document_store, formatted display data)
+        Tuple of (updated document_store, updated document_rows, display data)
     """
     if not files:
-        return document_store, format_document_display(document_store)
+        return document_store, document_rows, document_rows
+    
+    # Index known filenames once so duplicate checks are O(1) per file
+    known_filenames = {doc_data["filename"] for doc_data in document_store.values()}
     
+    to_read = []
     for file_path in files:
-        try:
-            filename = os.path.basename(file_path)
-            
-            # Check if this file already exists in the store (skip duplicates)
-            already_exists = any(
-                doc_data["filename"] == filename 
-                for doc_data in document_store.values()
-            )
-            
-            if already_exists:
-                print(f"Skipping duplicate file: {filename}")
-                continue
-            
-            # Read file content
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            # Generate unique document ID
-            doc_id = f"doc_{len(document_store) + 1}_{datetime.now().timestamp()}"
-            
-            # Get file metadata
-            file_size = os.path.getsize(file_path) / 1024  # KB
-            upload_date = datetime.now().strftime("%Y-%m-%d %H:%M")
-            
-            # Store document
-            document_store[doc_id] = {
-                "filename": filename,
-                "content": content,
-                "size_kb": round(file_size, 2),
-                "upload_date": upload_date,
-                "status": "Active"
-            }
-            print(f"Added new document: {filename}")
-        except Exception as e:
-            print(f"Error reading file {file_path}: {e}")
+        filename = os.path.basename(file_path)
+        
+        # Check if this file already exists in the store (skip duplicates)
+        if filename in known_filenames:
+            print(f"Skipping duplicate file: {filename}")
+            continue
+        known_filenames.add(filename)
+        to_read.append(file_path)
+    
+    # Read and hash files concurrently, deduplicating on this thread only
+    to_build = {}
+    for result in _read_pool.map(_read_one, to_read):
+        if result is None:
+            continue
+        file_path, doc_id, raw, truncated_file = result
+        
+        # Same content uploaded under another name (skip duplicates)
+        if doc_id in document_store or doc_id in to_build:
+            print(f"Skipping duplicate content: {os.path.basename(file_path)}")
+            continue
+        to_build[doc_id] = (file_path, raw, truncated_file)
+    
+    # Decode and persist only new documents, then update the store here
+    built = _read_pool.map(_build_document, to_build.values())
+    for doc_id, doc_data in zip(to_build, built, strict=True):
+        if doc_data is None:
             continue
+        document_store[doc_id] = doc_data
+        document_rows.append(_document_row(doc_data))
+        print(f"Added new document: {doc_data['filename']}")
     
-    return document_store, format_document_display(document_store)
+    return document_store, document_rows, document_rows
 
 
 def format_document_display(document_store: dict) -> list:
@@ -83,29 +112,170 @@ def format_document_display(document_store: dict) -> list:
     Returns:
         List of rows, each containing [filename, size_kb, upload_date, status]
     """
-    if not document_store:
-        return []
-    
-    rows = []
-    for doc_id, doc_data in document_store.items():
-        rows.append([
-            doc_data["filename"],
-            doc_data["size_kb"],
-            doc_data["upload_date"],
-            doc_data["status"]
-        ])
-    return rows
+    return [_document_row(doc_data) for doc_data in document_store.values()]
 
 
-def clear_documents(document_store: dict) -> Tuple[dict, list]:
+def clear_documents(document_store: dict, document_rows: list) -> Tuple[dict, list, list]:
     """
     Clear all documents from store.
     
     Args:
         document_store: Dictionary storing document data
+        document_rows: Display rows kept in sync with document_store
         
     Returns:
-        Tuple of (cleared document_store, empty display data)
+        Tuple of (cleared document_store, cleared document_rows, empty display data)
     """
+    for doc_data in document_store.values():
+        _remove_content_file(doc_data)
     document_store.clear()
-    return document_store, format_document_display(document_store)
+    document_rows.clear()
+    return document_store, document_rows, document_rows
+
+
+def get_document_content(document_store: dict, doc_id: str) -> str:
+    """
+    Load the full text of a stored document.
+    
+    Args:
+        document_store: Dictionary storing document data
+        doc_id: ID of the document to load
+        
+    Returns:
+        Full document text (up to MAX_DOC_BYTES of the original file)
+    """
+    with open(document_store[doc_id]["content_path"], 'rb') as f:
+        raw = zlib.decompress(f.read())
+    return _decode_text(raw)
+
+
+# ============================================================================
+# Private Helper Functions
+# ============================================================================
+
+
+def _document_row(doc_data: dict) -> list:
+    """
+    Build the display row for a single document.
+    
+    Args:
+        doc_data: Document data from the document store
+        
+    Returns:
+        Row containing [filename, size_kb, upload_date, status]
+    """
+    return [
+        doc_data["filename"],
+        doc_data["size_kb"],
+        doc_data["upload_date"],
+        doc_data["status"]
+    ]
+
+
+def _read_one(file_path: str) -> Optional[Tuple[str, str, bytes, bool]]:
+    """
+    Read and hash a single uploaded file.
+    
+    Runs on the reader pool, so it must not touch the document store.
+    
+    Args:
+        file_path: Path of the uploaded file
+        
+    Returns:
+        Tuple of (file path, document ID, raw bytes, whether the file was
+        truncated), or None if the file could not be read
+    """
+    try:
+        doc_id, raw, truncated_file = _read_document(file_path)
+    except Exception as e:
+        print(f"Error reading file {file_path}: {e}")
+        return None
+    return file_path, doc_id, raw, truncated_file
+
+
+def _build_document(read_result: Tuple[str, bytes, bool]) -> Optional[dict]:
+    """
+    Build the document store entry for a file that is not yet stored.
+    
+    Decodes the content, writes it compressed to disk and collects metadata.
+    Runs on the reader pool, so it must not touch the document store.
+    
+    Args:
+        read_result: Tuple of (file path, raw bytes, whether the file was truncated)
+        
+    Returns:
+        Document data, or None if the entry could not be built
+    """
+    file_path, raw, truncated_file = read_result
+    try:
+        content = _decode_text(raw)
+        
+        # Keep the full text on disk; only the snippet stays in memory
+        with tempfile.NamedTemporaryFile(
+            dir=_content_dir, suffix=".z", delete=False
+        ) as content_file:
+            content_file.write(zlib.compress(raw, CONTENT_COMPRESS_LEVEL))
+        
+        # Get file metadata
+        file_size = os.path.getsize(file_path) / 1024  # KB
+        upload_date = datetime.now().strftime("%Y-%m-%d %H:%M")
+    except Exception as e:
+        print(f"Error reading file {file_path}: {e}")
+        return None
+    
+    return {
+        "filename": os.path.basename(file_path),
+        "content_path": content_file.name,
+        "snippet": content[:SNIPPET_CHARS],
+        "truncated": len(content) > SNIPPET_CHARS,
+        "truncated_file": truncated_file,
+        "size_kb": round(file_size, 2),
+        "upload_date": upload_date,
+        "status": "Active"
+    }
+
+
+def _remove_content_file(doc_data: dict) -> None:
+    """
+    Delete the on-disk content of a document, ignoring missing files.
+    
+    Args:
+        doc_data: Document data from the document store
+    """
+    try:
+        os.unlink(doc_data["content_path"])
+    except FileNotFoundError:
+        pass
+
+
+def _decode_text(raw: bytes) -> str:
+    """Decode file bytes with the newline translation of text-mode open()."""
+    text = raw.decode('utf-8', errors='ignore')
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def _read_document(file_path: str) -> Tuple[str, bytes, bool]:
+    """
+    Read a file in blocks while hashing it.
+    
+    Reading stops at MAX_DOC_BYTES so large uploads stay bounded in memory.
+    
+    Args:
+        file_path: Path of the uploaded file
+        
+    Returns:
+        Tuple of (SHA-256 hex digest, raw bytes read, whether the file was truncated)
+    """
+    digest = hashlib.sha256()
+    blocks = []
+    remaining = MAX_DOC_BYTES
+    with open(file_path, 'rb') as f:
+        while remaining > 0:
+            block = f.read(min(READ_BLOCK_BYTES, remaining))
+            if not block:
+                break
+            digest.update(block)
+            blocks.append(block)
+            remaining -= len(block)
+        truncated_file = bool(f.read(1))
+    return digest.hexdigest(), b"".join(blocks), truncated_file
@@ -1,14 +1,69 @@
-import requests
+import httpx
+import ollama
+import orjson
 from settings import OLLAMA_HOST
 
 
+# Keep-alive pool limits for the async chat client
+_limits = httpx.Limits(
+    max_keepalive_connections=40,
+    max_connections=100,
+    keepalive_expiry=30.0,
+)
+_timeout = httpx.Timeout(300.0, connect=10.0)
+
+
+class AsyncOllamaClient(ollama.AsyncClient):
+    """
+    Async Ollama client that decodes streamed chat chunks with orjson.
+    
+    Streaming chat requests skip the SDK's per-chunk json decoding and
+    pydantic model construction and yield plain dicts instead. Every other
+    call goes through ollama.AsyncClient unchanged.
+    """
+
+    async def chat(self, model="", messages=None, *, stream=False, **kwargs):
+        if not stream or kwargs.get("tools"):
+            return await super().chat(model, messages, stream=stream, **kwargs)
+
+        payload = {"model": model, "messages": list(messages or []), "stream": True}
+        payload.update((key, value) for key, value in kwargs.items() if value is not None)
+        return self._stream_chat(payload)
+
+    async def _stream_chat(self, payload):
+        async with self._client.stream(
+            "POST", "/api/chat", content=orjson.dumps(payload)
+        ) as r:
+            if r.is_error:
+                await r.aread()
+                raise ollama.ResponseError(r.text, r.status_code)
+
+            async for line in r.aiter_lines():
+                if not line:
+                    continue
+                part = orjson.loads(line)
+                if err := part.get("error"):
+                    raise ollama.ResponseError(err)
+                yield part
+
+
+def create_ollama_client() -> AsyncOllamaClient:
+    """Create an async Ollama client with a bounded keep-alive pool."""
+    return AsyncOllamaClient(host=OLLAMA_HOST, limits=_limits, timeout=_timeout)
+
+
 def init_llm():
     try:
-        response = requests.get(f"{OLLAMA_HOST}")
-        if response.status_code == 200:
-            print("LLM initialized")
-            print(response.raw.read().decode("utf-8"))
-        else:
-            print("Failed to initialize LLM")
+        # One-off check, so use a short-lived client rather than a pool, and
+        # stream the response so only the first line of the body is read
+        with (
+            httpx.Client(base_url=OLLAMA_HOST, timeout=_timeout) as http,
+            http.stream("GET", "/") as response,
+        ):
+            if response.status_code == 200:
+                print(f"LLM initialized: {response.status_code}")
+                print(next(response.iter_lines(), ""))
+            else:
+                print("Failed to initialize LLM")
     except Exception as e:
         print(e)
@@ -9,9 +9,9 @@ Author: Captain
 """
 
 import sys
-import ollama
 from settings import OLLAMA_HOST, MODEL
 from chat_config import chat_fn
+from init_llm import create_ollama_client
 from ui.chat_interface import create_chat_interface
 
 
@@ -35,7 +35,7 @@ def main():
     print("=" * 60)
     
     # Initialize Ollama client
-    ollama_client = ollama.Client(host=OLLAMA_HOST)
+    ollama_client = create_ollama_client()
     
     # Create and launch the interface
     interface = create_chat_interface(ollama_client, chat_fn)
@@ -0,0 +1,112 @@
+"""
+Embedding-based response cache for near-duplicate questions.
+
+Replies are stored alongside the normalized embedding of the question that
+produced them. A lookup is a single matrix-vector product over all cached
+embeddings, restricted to entries recorded under the same conversation
+context (prior turns and uploaded documents).
+"""
+
+from typing import Hashable, Optional
+
+import numpy as np
+
+
+class SemanticCache:
+    """
+    Fixed-capacity cache of replies keyed by question embeddings.
+    
+    Entries are evicted least-recently-used first once capacity is reached.
+    Not thread-safe: like the other caches in chat_config, it must only be
+    used from coroutines on Gradio's event loop.
+    """
+
+    def __init__(self, capacity: int = 256, threshold: float = 0.95):
+        """
+        Args:
+            capacity: Maximum number of cached replies
+            threshold: Minimum cosine similarity for a lookup to hit
+        """
+        self.capacity = capacity
+        self.threshold = threshold
+        self._matrix = None  # (capacity, dim) float32, rows are unit vectors
+        self._contexts = [None] * capacity
+        self._context_hashes = np.zeros(capacity, dtype=np.int64)
+        self._replies = [None] * capacity
+        self._last_used = np.zeros(capacity, dtype=np.int64)
+        self._size = 0
+        self._tick = 0
+
+    def has_context(self, context: Hashable) -> bool:
+        """
+        Check whether any entry was recorded under the given context.
+        
+        Lets callers skip computing an embedding when no lookup could hit.
+        
+        Args:
+            context: Key of the conversation context
+            
+        Returns:
+            True if at least one cached reply shares the context
+        """
+        if self._size == 0:
+            return False
+        return bool(np.any(self._context_hashes[:self._size] == hash(context)))
+
+    def lookup(self, context: Hashable, embedding) -> Optional[dict]:
+        """
+        Find the cached reply closest to the given question embedding.
+        
+        Args:
+            context: Key of the conversation context the question was asked in
+            embedding: Question embedding
+            
+        Returns:
+            Cached reply dict if one is similar enough, otherwise None
+        """
+        query = _normalize(embedding)
+        if self._size == 0 or query.shape[0] != self._matrix.shape[1]:
+            return None
+        scores = self._matrix[:self._size] @ query
+        scores[self._context_hashes[:self._size] != hash(context)] = -np.inf
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold or self._contexts[best] != context:
+            return None
+        self._tick += 1
+        self._last_used[best] = self._tick
+        return self._replies[best]
+
+    def add(self, context: Hashable, embedding, reply: dict) -> None:
+        """
+        Store a reply for the given question embedding.
+        
+        Args:
+            context: Key of the conversation context the question was asked in
+            embedding: Question embedding
+            reply: Reply dict to return on future hits
+        """
+        vector = _normalize(embedding)
+        if self._matrix is None or vector.shape[0] != self._matrix.shape[1]:
+            # First entry, or the embedding model changed: start over
+            self._matrix = np.zeros((self.capacity, vector.shape[0]), dtype=np.float32)
+            self._size = 0
+
+        if self._size < self.capacity:
+            row = self._size
+            self._size += 1
+        else:
+            row = int(np.argmin(self._last_used))
+
+        self._tick += 1
+        self._matrix[row] = vector
+        self._contexts[row] = context
+        self._context_hashes[row] = hash(context)
+        self._replies[row] = reply
+        self._last_used[row] = self._tick
+
+
+def _normalize(embedding) -> np.ndarray:
+    """Convert an embedding to a float32 unit vector."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
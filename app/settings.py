@@ -2,3 +2,26 @@
 
 OLLAMA_HOST = "http://localhost:11434"
 MODEL = "deepseek-r1:8b"
+
+# Runtime options shared by every request to the model. Ollama reloads a model
+# when these differ between requests, so all callers must pass the same ones.
+KEEP_ALIVE = "1h"
+MODEL_OPTIONS = {
+    "num_ctx": 8192,
+    "num_batch": 512,
+}
+
+# Small, fast model used to summarize older conversation turns. Keep it
+# separate from MODEL so summaries don't compete with replies for the same
+# loaded model; pull it with `ollama pull llama3.2:1b`.
+SUMMARY_MODEL = "llama3.2:1b"
+
+# Number of chat responses streamed at the same time across all users.
+# Gradio runs one event at a time by default; match Ollama's
+# OLLAMA_NUM_PARALLEL so requests are not just queued on the server.
+CHAT_CONCURRENCY_LIMIT = 4
+
+# Semantic response cache: serve near-duplicate questions from earlier replies
+ENABLE_SEMANTIC_CACHE = False
+EMBED_MODEL = "nomic-embed-text"
+SEMANTIC_CACHE_THRESHOLD = 0.95
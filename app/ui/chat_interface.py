@@ -6,6 +6,7 @@ including the chat window, thinking display, and document manager.
 """
 
 import gradio as gr
+from settings import CHAT_CONCURRENCY_LIMIT
 from handlers.chat_handlers import add_message, bot_response, show_history_size
 from handlers.document_handlers import (
     handle_file_upload,
@@ -26,15 +27,25 @@ def create_chat_interface(ollama_client, chat_fn) -> gr.Blocks:
     - Document upload and management section
     
     Args:
-        ollama_client: Ollama client instance for LLM communication
+        ollama_client: Async Ollama client instance for LLM communication
         chat_fn: Chat function from chat_config module
         
     Returns:
         Gradio Blocks interface ready to launch
     """
     with gr.Blocks() as interface:
-        # Initialize document store state
-        document_store_state = gr.State(value={})
+        # Initialize document store state; on-disk document content is
+        # removed when the session's state expires
+        document_store_state = gr.State(
+            value={},
+            delete_callback=lambda store: clear_documents(store, []),
+        )
+
+        # Display rows for the document table, appended to as files are added
+        document_rows_state = gr.State(value=[])
+
+        # LLM-ready conversation history, maintained incrementally per turn
+        llm_history_state = gr.State(value=[])
 
         # Init token usage state
         token_usage_state = gr.State(value={'prompt':0, 'response':0})
@@ -106,24 +117,27 @@ def create_chat_interface(ollama_client, chat_fn) -> gr.Blocks:
 
             return f"Total tokens: {total} (Prompt: {prompt}, Response: {response})"
 
-        def bot_response_wrapper(history, doc_store, token_counts_state):
+        async def bot_response_wrapper(history, llm_history, doc_store, token_counts_state):
             """Wrapper to bind ollama_client and chat_fn to bot_response."""
-            for h, t, tokens in bot_response(history, doc_store, ollama_client, chat_fn):
+            async for h, t, tokens in bot_response(
+                history, llm_history, doc_store, ollama_client, chat_fn
+            ):
                 yield h, t, tokens
 
         # Chat message submission
         chat_msg = chat_msg_input.submit(
             add_message, 
-            [chatbot, chat_msg_input], 
-            [chatbot, chat_msg_input]
+            [chatbot, chat_msg_input, llm_history_state], 
+            [chatbot, chat_msg_input, llm_history_state]
         )
         
         # Bot response generation
         bot_msg = chat_msg.then(
             bot_response_wrapper,
-            [chatbot, document_store_state, token_usage_state], 
+            [chatbot, llm_history_state, document_store_state, token_usage_state], 
             [chatbot, thoughts, token_usage_state], 
-            api_name="bot_response"
+            api_name="bot_response",
+            concurrency_limit=CHAT_CONCURRENCY_LIMIT,
         )
         
         # Re-enable input after bot response
@@ -133,18 +147,21 @@ def create_chat_interface(ollama_client, chat_fn) -> gr.Blocks:
             [chat_msg_input]
         )
         
+        # Reset the LLM-ready history when the chat is cleared (Trash button)
+        chatbot.clear(lambda: [], None, llm_history_state)
+        
         # Document upload handler
         file_upload.change(
             handle_file_upload,
-            [file_upload, document_store_state],
-            [document_store_state, documents_display]
+            [file_upload, document_store_state, document_rows_state],
+            [document_store_state, document_rows_state, documents_display]
         )
         
         # Clear documents button handler
         clear_docs_btn.click(
             clear_documents,
-            document_store_state,
-            [document_store_state, documents_display]
+            [document_store_state, document_rows_state],
+            [document_store_state, document_rows_state, documents_display]
         )
 
         # get token usage